@@ -0,0 +1,109 @@
+"""Read-your-writes check of the causal token against a replica set.
+
+Posts messages through `create_message` and reads them back through `read_messages`,
+which is routed to a secondary. Each read is sent twice: without the causal token, where
+a secondary that has not applied the write yet answers without the message, and with the
+X-Causal-Token of the write, where the secondary waits until it has it.
+
+Start the replica set of docker-compose.yml and run from the repository root:
+
+    docker compose --profile replica-set up -d
+    MONGO_URI="mongodb://mongo-rs1:27018,mongo-rs2:27019,mongo-rs3:27020/?replicaSet=rs0" \\
+        python -m benchmarks.causal --messages 200 --lag-ms 300
+
+`--lag-ms` holds replication on every secondary with the stopReplProducer fail point for
+that long after each write, so stale reads show up even on an idle machine. It needs
+mongod started with enableTestCommands. The run fails if a read with the token misses
+its own write.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from pymongo import AsyncMongoClient
+
+import main
+
+
+async def secondaries() -> list:
+    hello = await main.client.admin.command("hello")
+    if "setName" not in hello:
+        sys.exit("MONGO_URI does not point to a replica set")
+    return [
+        AsyncMongoClient(f"mongodb://{host}/", directConnection=True)
+        for host in hello["hosts"] if host != hello["primary"]
+    ]
+
+
+async def hold_replication(members: list, mode: str):
+    await asyncio.gather(*(member.admin.command("configureFailPoint", "stopReplProducer", mode=mode) for member in members))
+
+
+async def release_after(members: list, lag_ms: int):
+    await asyncio.sleep(lag_ms / 1000)
+    await hold_replication(members, "off")
+
+
+def contains(response: httpx.Response, message_id: str) -> bool:
+    response.raise_for_status()
+    return any(message["id"] == message_id for message in response.json())
+
+
+async def run(args) -> int:
+    members = await secondaries()
+    transport = httpx.ASGITransport(app=main.app)
+    # Two clients, the causal_token cookie of the writer must not reach the plain reads
+    writer = httpx.AsyncClient(transport=transport, base_url="http://causal", timeout=args.timeout)
+    plain = httpx.AsyncClient(transport=transport, base_url="http://causal", timeout=args.timeout)
+
+    user = (await writer.post("/users/", json={"name": "Causal", "email": f"causal-{time.time_ns()}@example.com"})).json()
+    group = (await writer.post("/groups/", json={
+        "name": "Causal", "description": "", "icon": "", "cover_photo": "", "group_type": "check",
+        "allow_members_to_publish": True, "allow_members_to_create_events": True,
+    })).json()
+    thread = (await writer.post("/threads", json={"parents_id": group["id"], "text": "causal", "user": user["id"], "timestamp": "2024-01-01T00:00:00"})).json()
+    messages_url = f"/threads/{thread['id']}/messages"
+
+    stale, missed, waits = 0, 0, []
+    try:
+        for index in range(args.messages):
+            if args.lag_ms:
+                await hold_replication(members, "alwaysOn")
+            response = await writer.post(messages_url, json={"text": f"message {index}", "user": user["id"], "timestamp": "2024-01-01T00:00:00", "parents": ""})
+            response.raise_for_status()
+            message_id = response.json()["id"]
+            token = response.headers.get(main.CAUSAL_TOKEN_HEADER)
+            if not token:
+                sys.exit("create_message answered without a causal token")
+
+            stale += not contains(await plain.get(messages_url, params={"limit": main.MAX_PAGE_SIZE}), message_id)
+            release = asyncio.create_task(release_after(members, args.lag_ms)) if args.lag_ms else None
+            started = time.perf_counter()
+            missed += not contains(await writer.get(messages_url, params={"limit": main.MAX_PAGE_SIZE}, headers={main.CAUSAL_TOKEN_HEADER: token}), message_id)
+            waits.append((time.perf_counter() - started) * 1000)
+            if release:
+                await release
+    finally:
+        if args.lag_ms:
+            await hold_replication(members, "off")
+        await writer.delete(f"/groups/{group['id']}")
+        await writer.aclose()
+        await plain.aclose()
+        for member in members:
+            await member.close()
+
+    print(f"{args.messages} writes on {len(members)} secondaries")
+    print(f"without token: {stale} reads missed their own write")
+    print(f"with token:    {missed} reads missed their own write, median wait {statistics.median(waits):.1f} ms")
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-your-writes check of the causal token against a replica set")
+    parser.add_argument("--messages", type=int, default=100, help="Number of messages written and read back")
+    parser.add_argument("--lag-ms", type=int, default=0, help="Hold replication on the secondaries this long after each write")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds")
+    sys.exit(asyncio.run(run(parser.parse_args())))
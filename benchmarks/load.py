@@ -0,0 +1,369 @@
+"""Throughput and p50/p95/p99 latency of the route families under concurrent load.
+
+Seeds synthetic data, boots `main.app` in process and drives every scenario with
+`--concurrency` clients. The results are written as JSON so that two commits can be
+compared with `--compare`.
+
+Run from the repository root:
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --users 1000000 --events 100000 --members 5000 --messages 100000
+    python -m benchmarks.load --compare before.json --output after.json
+    python -m benchmarks.load --stand-in
+
+Against mongod, main.py connects with MONGO_URI, MONGO_DATABASE and the other MONGO_*
+settings. The collections must be empty; pass --reset to drop them first. `--url` sends the requests to a running server
+instead of the in-process app, and the data is still seeded through main.py.
+
+`--stand-in` runs on the mongomock_motor stand-in of tests/standin.py, so no mongod is
+needed; install requirements-dev.txt for it. The stand-in has no $text support, so its
+search scenarios run in regex mode.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from bson import ObjectId
+
+SEED_BATCH_SIZE = 10_000
+CITIES = ["Paris", "Lyon", "Marseille", "Lille", "Nantes", "Bordeaux", "Toulouse", "Nice"]
+
+
+def load_main(stand_in: bool):
+    if stand_in:
+        from tests.standin import import_main
+
+        return import_main()
+    return importlib.import_module("main")
+
+
+## Seed
+
+async def insert_batches(collection, documents):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == SEED_BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(main, args) -> dict:
+    collections = [
+        main.user_collection, main.event_collection, main.group_collection, main.thread_collection,
+        main.message_collection, main.photo_album_collection, main.photo_collection,
+    ]
+    if args.reset:
+        for collection in collections:
+            await collection.drop()
+    for collection in collections:
+        if await collection.find_one({}, {"_id": 1}):
+            sys.exit(f"{collection.name} is not empty, pass --reset to drop the benchmark collections")
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    user_ids = [ObjectId() for _ in range(args.users)]
+    await insert_batches(main.user_collection, (
+        main.with_typeahead_keys({"_id": user_id, "name": f"Member {i}", "email": f"member{i}@example.com"})
+        for i, user_id in enumerate(user_ids)
+    ))
+    user_ids = [str(user_id) for user_id in user_ids]
+    members = min(args.members, len(user_ids))
+
+    event_ids = [ObjectId() for _ in range(args.events)]
+    await insert_batches(main.event_collection, (
+        main.with_typeahead_keys({
+            "_id": event_id,
+            "name": f"Concert {i}",
+            "description": "Synthetic event",
+            "start_date": datetime(2024, i % 12 + 1, 1, 20),
+            "end_date": datetime(2024, i % 12 + 1, 2, 2),
+            "location": CITIES[i % len(CITIES)],
+            "cover_photo": "",
+            "is_private": i % 2 == 0,
+            "organizers": rng.sample(user_ids, min(3, members)),
+            "members": rng.sample(user_ids, members),
+            "polls": [],
+        })
+        for i, event_id in enumerate(event_ids)
+    ))
+
+    await insert_batches(main.group_collection, (
+        main.with_typeahead_keys({
+            "name": f"Group {i}",
+            "description": "Synthetic group",
+            "icon": "",
+            "cover_photo": "",
+            "group_type": "public" if i % 2 else "private",
+            "allow_members_to_publish": True,
+            "allow_members_to_create_events": False,
+            "admin": rng.sample(user_ids, min(2, members)),
+        })
+        for i in range(args.groups)
+    ))
+
+    # Every message goes to one hot thread, the other threads stay empty
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    thread_ids = [ObjectId() for _ in range(args.threads)]
+    await insert_batches(main.thread_collection, (
+        {"_id": thread_id, "parents_id": str(event_ids[i % len(event_ids)]), "parent_type": "event", "text": f"Thread {i}", "user": rng.choice(user_ids), "timestamp": start}
+        for i, thread_id in enumerate(thread_ids)
+    ))
+    hot_thread_id = str(thread_ids[0])
+    await insert_batches(main.message_collection, (
+        {"text": f"hello from message {i}", "user": rng.choice(user_ids), "timestamp": start + timedelta(seconds=i), "parents": "", "thread_id": hot_thread_id}
+        for i in range(args.messages)
+    ))
+
+    # One big album, photo documents only since read_photos never opens the files
+    album = await main.photo_album_collection.insert_one({"event_id": str(event_ids[0])})
+    album_id = str(album.inserted_id)
+    await insert_batches(main.photo_collection, (
+        {
+            "photo_album_id": album_id,
+            "user_id": rng.choice(user_ids),
+            "filename": f"photo-{i}.jpg",
+            "file_id": ObjectId(),
+            "content_type": "image/jpeg",
+            "length": 250_000,
+        }
+        for i in range(args.photos)
+    ))
+
+    print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return {
+        "user_ids": user_ids,
+        "event_ids": [str(event_id) for event_id in event_ids],
+        "hot_thread_id": hot_thread_id,
+        "album_id": album_id,
+    }
+
+
+## Scenarios
+
+# Each scenario sends one request; `state` belongs to one client and keeps its page cursor
+async def search_users(http, data, state):
+    return await http.get("/users/", params={"name": "Member", "mode": data["search_mode"], "limit": 1000})
+
+
+async def search_events(http, data, state):
+    return await http.get("/events", params={"name": "Concert", "mode": data["search_mode"], "limit": 1000})
+
+
+async def search_groups(http, data, state):
+    return await http.get("/groups", params={"name": "Group", "mode": data["search_mode"], "limit": 1000})
+
+
+async def search_messages(http, data, state):
+    return await http.get(f"/threads/{data['hot_thread_id']}/messages/search/", params={"text": "hello", "mode": data["search_mode"], "limit": 1000})
+
+
+async def typeahead_users(http, data, state):
+    # What a picker sends after a few keystrokes, "member 12" matches Member 12, 120 to 129, ...
+    return await http.get("/typeahead/users", params={"q": f"member {random.randint(1, 99)}"})
+
+
+async def typeahead_events(http, data, state):
+    return await http.get("/typeahead/events", params={"q": "conc"})
+
+
+async def read_event(http, data, state):
+    return await http.get(f"/events/{random.choice(data['event_ids'])}")
+
+
+async def read_user(http, data, state):
+    return await http.get(f"/users/{random.choice(data['user_ids'])}")
+
+
+async def read_calendar(http, data, state):
+    return await http.get(f"/users/{random.choice(data['user_ids'])}/calendar", params={"from": "2024-03-01", "to": "2024-04-01"})
+
+
+async def walk_pages(http, url, limit, state):
+    # Follows X-Next-Cursor to the end, then starts over from the first page
+    params = {"limit": limit}
+    if state.get("after"):
+        params["after"] = state["after"]
+    response = await http.get(url, params=params)
+    state["after"] = response.headers.get("x-next-cursor")
+    return response
+
+
+async def read_messages(http, data, state):
+    return await walk_pages(http, f"/threads/{data['hot_thread_id']}/messages", 100, state)
+
+
+async def read_photos(http, data, state):
+    return await walk_pages(http, f"/photoalbum/{data['album_id']}/photo", 1000, state)
+
+
+async def create_message(http, data, state):
+    message = {
+        "text": "hello from the load benchmark",
+        "user": random.choice(data["user_ids"]),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parents": "",
+    }
+    return await http.post(f"/threads/{data['hot_thread_id']}/messages", json=message)
+
+
+SCENARIOS = {
+    "search_users": search_users,
+    "search_events": search_events,
+    "search_groups": search_groups,
+    "search_messages": search_messages,
+    "typeahead_users": typeahead_users,
+    "typeahead_events": typeahead_events,
+    "read_event": read_event,
+    "read_user": read_user,
+    "read_calendar": read_calendar,
+    "read_messages": read_messages,
+    "read_photos": read_photos,
+    "create_message": create_message,
+}
+
+
+## Measure
+
+def percentile(latencies: list, fraction: float) -> float:
+    # Nearest rank on sorted latencies
+    return latencies[max(math.ceil(len(latencies) * fraction) - 1, 0)]
+
+
+async def run_scenario(http, scenario, data, concurrency: int, requests: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await scenario(http, data, {})
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        state = {}
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario(http, data, state)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}", file=sys.stderr)
+    for name, stats in results["scenarios"].items():
+        line = f"{name:<16} {stats['throughput']:>9,.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>7}"
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            throughput = (stats["throughput"] / previous["throughput"] - 1) * 100
+            p95 = (stats["p95_ms"] / previous["p95_ms"] - 1) * 100 if previous["p95_ms"] else 0
+            line += f"   req/s {throughput:+.1f}%  p95 {p95:+.1f}%"
+        print(line, file=sys.stderr)
+
+
+async def run(args) -> dict:
+    main = load_main(args.stand_in)
+    data = await seed(main, args)
+    data["search_mode"] = "regex" if args.stand_in else args.search_mode
+
+    if args.url:
+        http = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        lifespan = None
+    else:
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://benchmark", timeout=args.timeout)
+        lifespan = main.lifespan(main.app)
+        await lifespan.__aenter__()
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "backend": "stand-in" if args.stand_in else "mongod",
+        "target": args.url or "in-process",
+        "scale": {name: getattr(args, name) for name in ("users", "events", "members", "groups", "threads", "messages", "photos")},
+        "search_mode": data["search_mode"],
+        "concurrency": args.concurrency,
+        "scenarios": {},
+    }
+    try:
+        async with http:
+            for name in args.scenarios:
+                print(f"Running {name}", file=sys.stderr)
+                results["scenarios"][name] = await run_scenario(http, SCENARIOS[name], data, args.concurrency, args.requests, args.warmup)
+    finally:
+        if lifespan:
+            await lifespan.__aexit__(None, None, None)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark of the Facebook API routes")
+    parser.add_argument("--stand-in", action="store_true", help="Use mongomock_motor instead of mongod")
+    parser.add_argument("--reset", action="store_true", help="Drop the collections before seeding")
+    parser.add_argument("--url", help="Base URL of a running server, the in-process app is used otherwise")
+    parser.add_argument("--users", type=int, default=10_000, help="Number of users")
+    parser.add_argument("--events", type=int, default=1_000, help="Number of events")
+    parser.add_argument("--members", type=int, default=500, help="Members per event")
+    parser.add_argument("--groups", type=int, default=1_000, help="Number of groups")
+    parser.add_argument("--threads", type=int, default=100, help="Number of threads")
+    parser.add_argument("--messages", type=int, default=10_000, help="Messages in the hot thread")
+    parser.add_argument("--photos", type=int, default=10_000, help="Photos in the big album")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS), help="Scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Requests per scenario sent before measuring")
+    parser.add_argument("--search-mode", choices=["text", "regex"], default="text", help="Mode of the search scenarios")
+    parser.add_argument("--timeout", type=float, default=60, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results JSON of a previous run to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
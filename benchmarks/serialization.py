@@ -0,0 +1,92 @@
+"""Documents per second for the list response path, before and after the orjson path.
+
+Run from the repository root with `python -m benchmarks.serialization`.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+import main
+
+
+def event_documents(count: int) -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Event {i}",
+            "description": "Synthetic event used to measure serialization",
+            "start_date": datetime(2024, 6, 1, 20),
+            "end_date": datetime(2024, 6, 1, 23),
+            "location": "Paris",
+            "cover_photo": "cover.jpg",
+            "is_private": i % 2 == 0,
+            "organizers": [str(ObjectId()) for _ in range(3)],
+            "members": [str(ObjectId()) for _ in range(20)],
+            "polls": [],
+        }
+        for i in range(count)
+    ]
+
+
+def message_documents(count: int) -> list:
+    thread_id = str(ObjectId())
+    start = datetime(2024, 6, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "text": f"Message number {i} in a long thread",
+            "user": str(ObjectId()),
+            "timestamp": start + timedelta(seconds=i, microseconds=i % 1000 * 1000),
+            "parents": "",
+            "thread_id": thread_id,
+        }
+        for i in range(count)
+    ]
+
+
+def pydantic_path(model, documents: list) -> bytes:
+    # What the list routes used to do: build a model per document, then FastAPI
+    # dumps, validates and serializes the list again for response_model
+    models = [model(id=str(document["_id"]), **document) for document in documents]
+    adapter = TypeAdapter(List[model])
+    content = adapter.dump_python(adapter.validate_python([m.model_dump() for m in models]), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def orjson_path(model, documents: list) -> bytes:
+    projection = main.model_projection(model)
+    defaults = main.model_defaults(model)
+    return main.dump_json([main.document_item(document, projection, defaults) for document in documents])
+
+
+def measure(function, model, documents: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(model, documents)
+        best = min(best, time.perf_counter() - started)
+    return len(documents) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=10_000, help="Documents per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path, the best one is kept")
+    args = parser.parse_args()
+
+    cases = [
+        ("search_events", main.EventInDB, event_documents(args.documents)),
+        ("read_messages", main.MessageInDB, message_documents(args.documents)),
+    ]
+    print(f"{'route':<15} {'pydantic docs/s':>16} {'orjson docs/s':>14} {'speedup':>8}")
+    for route, model, documents in cases:
+        # Both paths must produce the same JSON
+        assert json.loads(pydantic_path(model, documents)) == json.loads(orjson_path(model, documents))
+        before = measure(pydantic_path, model, documents, args.repeat)
+        after = measure(orjson_path, model, documents, args.repeat)
+        print(f"{route:<15} {before:>16,.0f} {after:>14,.0f} {after / before:>7.1f}x")
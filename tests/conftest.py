@@ -0,0 +1,84 @@
+"""Fixtures running `main.app` in process on the mongomock_motor stand-in of standin.py.
+
+Install requirements-dev.txt and run from the repository root:
+
+    python -m pytest tests
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from standin import MemoryBucket, import_main
+
+main = import_main()
+
+
+@pytest.fixture
+def bucket(monkeypatch) -> MemoryBucket:
+    bucket = MemoryBucket()
+    monkeypatch.setattr(main, "photo_bucket", bucket)
+    # Image workers read GridFS with a client of their own, here they are a thread reading the bucket
+    monkeypatch.setattr(main, "open_photo_source", lambda file_id: io.BytesIO(bucket.files[file_id][0]))
+    monkeypatch.setattr(main, "image_executor", ThreadPoolExecutor(max_workers=1))
+    return bucket
+
+
+@pytest.fixture
+def client(bucket):
+    with TestClient(main.app) as client:
+        yield client
+        client.portal.call(main.client.drop_database, main.db.name)
+
+
+@pytest.fixture
+def user(client) -> dict:
+    response = client.post("/users/", json={"name": "Ann", "email": f"ann-{ObjectId()}@example.com"})
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.fixture
+def event(client) -> dict:
+    response = client.post("/events/", json={
+        "name": "Party", "description": "", "start_date": "2024-06-01T20:00:00", "end_date": "2024-06-02T02:00:00",
+        "location": "Paris", "cover_photo": "", "is_private": False,
+    })
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.fixture
+def album(client, event) -> dict:
+    response = client.post(f"/events/{event['id']}/photoalbum", json={})
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.fixture
+def png() -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (64, 48), "red").save(output, "PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def thread(client, event, user) -> dict:
+    response = client.post("/threads", json={"parents_id": event["id"], "text": "Hello", "user": user["id"], "timestamp": "2024-06-01T20:00:00"})
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.fixture
+def refreshed_threads(monkeypatch) -> list:
+    # mongomock cannot run the pipeline updates of refresh_thread_summaries, the tests check the call
+    refreshed = []
+
+    async def refresh_thread_summaries(thread_ids: list):
+        refreshed.extend(thread_ids)
+
+    monkeypatch.setattr(main, "refresh_thread_summaries", refresh_thread_summaries)
+    return refreshed
@@ -0,0 +1,129 @@
+"""mongomock_motor stand-in for MongoDB, used by the tests and by `benchmarks.load --stand-in`.
+
+`import_main()` imports main.py on a mongomock_motor client and an in-memory GridFS bucket.
+pymongo and gridfs are only patched while main.py is imported, the other patches fill
+gaps of mongomock itself.
+"""
+import importlib
+
+import gridfs
+import mongomock.collection
+import mongomock_motor
+import pymongo
+from bson import ObjectId
+from gridfs import NoFile
+
+
+class StandInClient(mongomock_motor.AsyncMongoMockClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+    async def close(self):
+        pass
+
+
+class MemoryGridIn:
+    def __init__(self, files: dict, file_id, filename: str, metadata: dict):
+        self.files = files
+        self._id = file_id
+        self.filename = filename
+        self.metadata = metadata
+        self.data = b""
+
+    @property
+    def length(self) -> int:
+        return len(self.data)
+
+    async def write(self, data: bytes):
+        self.data += data
+
+    async def close(self):
+        self.files[self._id] = (self.data, self.filename, self.metadata)
+
+    async def abort(self):
+        pass
+
+
+class MemoryGridOut:
+    def __init__(self, data: bytes, filename: str, metadata: dict):
+        self.data = data
+        self.filename = filename
+        self.metadata = metadata
+        self.length = len(data)
+        self.position = 0
+
+    async def seek(self, position: int):
+        self.position = position
+
+    async def read(self, size: int = -1) -> bytes:
+        end = self.length if size < 0 else self.position + size
+        data = self.data[self.position:end]
+        self.position += len(data)
+        return data
+
+
+class MemoryBucket:
+    # The part of AsyncGridFSBucket that main.py uses
+    def __init__(self, *args, **kwargs):
+        self.files = {}
+
+    def open_upload_stream(self, filename: str, chunk_size_bytes: int = None, metadata: dict = None) -> MemoryGridIn:
+        return MemoryGridIn(self.files, ObjectId(), filename, metadata)
+
+    async def upload_from_stream(self, filename: str, source: bytes, chunk_size_bytes: int = None, metadata: dict = None):
+        file_id = ObjectId()
+        await self.upload_from_stream_with_id(file_id, filename, source, chunk_size_bytes, metadata)
+        return file_id
+
+    async def upload_from_stream_with_id(self, file_id, filename: str, source: bytes, chunk_size_bytes: int = None, metadata: dict = None):
+        self.files[file_id] = (source, filename, metadata)
+
+    async def open_download_stream(self, file_id) -> MemoryGridOut:
+        if file_id not in self.files:
+            raise NoFile(file_id)
+        return MemoryGridOut(*self.files[file_id])
+
+    async def delete(self, file_id):
+        if self.files.pop(file_id, None) is None:
+            raise NoFile(file_id)
+
+
+def document_order(value):
+    # MongoDB compares subdocuments field by field, as the thread `last_message` $max relies on
+    if isinstance(value, dict):
+        return tuple((name, document_order(item)) for name, item in value.items())
+    return value
+
+
+def max_updater(document, field_name, value):
+    if isinstance(document, dict):
+        document[field_name] = max(document.get(field_name, value), value, key=document_order)
+
+
+def patch_mongomock():
+    aggregate = mongomock_motor.AsyncMongoMockCollection.aggregate
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    async def awaitable_aggregate(self, *args, **kwargs):
+        return aggregate(self, *args, **kwargs)
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        # Recent pymongo passes the sort of UpdateOne, which mongomock does not know
+        return add_update(self, *args, **kwargs)
+
+    mongomock_motor.AsyncMongoMockCollection.aggregate = awaitable_aggregate
+    mongomock.collection.BulkOperationBuilder.add_update = add_update_without_sort
+    mongomock.collection._updaters["$max"] = max_updater
+    # There is a single stand-in server, a read preference changes nothing
+    mongomock_motor.AsyncMongoMockCollection.with_options = lambda self, *args, **kwargs: self
+
+
+def import_main():
+    # main.py creates its client and bucket at import
+    patch_mongomock()
+    client_class, bucket_class = pymongo.AsyncMongoClient, gridfs.AsyncGridFSBucket
+    pymongo.AsyncMongoClient, gridfs.AsyncGridFSBucket = StandInClient, MemoryBucket
+    try:
+        return importlib.import_module("main")
+    finally:
+        pymongo.AsyncMongoClient, gridfs.AsyncGridFSBucket = client_class, bucket_class
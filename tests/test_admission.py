@@ -0,0 +1,58 @@
+import asyncio
+
+import main
+
+
+class Stream:
+    # Drives the ASGI app directly, the test client only returns once the body is complete
+    def __init__(self, path: str):
+        self.path = path
+        self.status = asyncio.get_running_loop().create_future()
+        self.requested = False
+        self.disconnected = asyncio.Event()
+        self.task = asyncio.create_task(main.app(self.scope(), self.receive, self.send))
+
+    def scope(self) -> dict:
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": self.path, "raw_path": self.path.encode(), "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80),
+        }
+
+    async def receive(self) -> dict:
+        if not self.requested:
+            self.requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict):
+        if message["type"] == "http.response.start" and not self.status.done():
+            self.status.set_result(message["status"])
+
+    async def close(self):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+def test_stream_holds_its_slot_until_the_body_ends(client, thread, monkeypatch):
+    admission = main.admission_queues["events"]
+    monkeypatch.setattr(admission, "concurrency", 1)
+    monkeypatch.setattr(admission, "queue", 0)
+    path = f"/threads/{thread['id']}/events"
+
+    async def scenario() -> list:
+        first = Stream(path)
+        statuses = [await first.status]
+        second = Stream(path)
+        statuses.append(await second.status)
+        await second.close()
+
+        await first.close()
+        third = Stream(path)
+        statuses.append(await third.status)
+        await third.close()
+        return statuses
+
+    assert client.portal.call(scenario) == [200, 429, 200]
+    assert admission.active == 0
@@ -0,0 +1,86 @@
+import gzip
+
+import pytest
+
+import main
+from test_messages import message
+from test_photos import upload
+
+
+def export(client, event: dict, archive_format: str) -> bytes:
+    response = client.get(f"/events/{event['id']}/export", params={"format": archive_format})
+    assert response.status_code == 200
+    return response.content
+
+
+def records(archive: bytes, archive_format: str) -> list:
+    reader = main.ArchiveReader(main.ArchiveFormat(archive_format))
+    result = reader.feed(archive)
+    reader.close()
+    return result
+
+
+def import_archive(client, archive: bytes, archive_format: str):
+    return client.post("/import", params={"format": archive_format}, files={"archive": ("archive.gz", archive, "application/gzip")})
+
+
+@pytest.mark.parametrize("archive_format", ["ndjson", "bson"])
+def test_export_import_round_trip(client, bucket, event, album, thread, user, png, refreshed_threads, archive_format):
+    photos = [upload(client, album, user, png), upload(client, album, user, png)]
+    for text in ("one", "two"):
+        client.post(f"/threads/{thread['id']}/messages", json={**message(text), "parents": thread["id"]}).raise_for_status()
+    [blob] = client.portal.call(main.photo_blob_collection.find().to_list)
+
+    archive = export(client, event, archive_format)
+    # Both photos share one blob, its files are written once
+    file_records = [record for record in records(archive, archive_format) if record["type"] == "file"]
+    assert len(file_records) == len(main.photo_file_ids(blob))
+
+    client.portal.call(main.client.drop_database, main.db.name)
+    bucket.files.clear()
+    response = import_archive(client, archive, archive_format)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["root"] == "event"
+    assert result["imported"] == {"event": 1, "group": 0, "photo_album": 1, "photo": 2, "thread": 1, "message": 2, "file": len(file_records)}
+
+    # Every document has a new id and points to the new ids of its parents
+    event_id = result["id"]
+    assert event_id != event["id"]
+    assert client.get(f"/events/{event_id}").json()["name"] == "Party"
+    [new_album] = client.get(f"/events/{event_id}/photoalbum").json()
+    assert new_album["id"] != album["id"]
+    [new_thread] = client.portal.call(main.thread_collection.find().to_list)
+    new_thread_id = str(new_thread["_id"])
+    assert new_thread_id != thread["id"]
+    assert new_thread["parents_id"] == event_id
+    assert refreshed_threads == [new_thread["_id"]]
+    messages = client.portal.call(main.message_collection.find().to_list)
+    assert {(message["thread_id"], message["parents"]) for message in messages} == {(new_thread_id, new_thread_id)}
+
+    new_photos = client.get(f"/photoalbum/{new_album['id']}/photo").json()
+    assert len(new_photos) == 2
+    assert not {photo["id"] for photo in new_photos} & {photo["id"] for photo in photos}
+    [new_blob] = client.portal.call(main.photo_blob_collection.find().to_list)
+    assert new_blob["refs"] == 2
+    for photo in new_photos:
+        assert client.get(photo["url"]).content == png
+
+
+def test_import_into_the_same_database_shares_the_blob(client, bucket, event, album, user, png, refreshed_threads):
+    upload(client, album, user, png)
+    files = dict(bucket.files)
+
+    response = import_archive(client, export(client, event, "ndjson"), "ndjson")
+    assert response.status_code == 200
+    assert response.json()["imported"]["file"] == 0
+    [blob] = client.portal.call(main.photo_blob_collection.find().to_list)
+    assert blob["refs"] == 2
+    assert bucket.files == files
+
+
+@pytest.mark.parametrize("archive", [b"not an archive", gzip.compress(b'{"type": "event", "doc": {}}\n'), gzip.compress(b"{")])
+def test_garbage_archive_is_rejected(client, archive):
+    response = import_archive(client, archive, "ndjson")
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid archive")
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("batch_size", [1000, 2])
+def test_bulk_reports_the_index_of_each_failure(client, user, monkeypatch, batch_size):
+    client.portal.call(main.ensure_indexes)
+    monkeypatch.setattr(main, "BULK_BATCH_SIZE", batch_size)
+    items = [
+        {"name": "Bob", "email": "bob@example.com"},
+        {"name": "Ann again", "email": user["email"]},
+        {"name": "No email"},
+        {"name": "Bob again", "email": "bob@example.com"},
+        {"name": "Cid", "email": "cid@example.com"},
+    ]
+
+    response = client.post("/users/bulk", content="\n".join(map(json.dumps, items)), headers={"Content-Type": main.NDJSON_MEDIA_TYPE})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 3)
+    assert [(item["index"], item["error"]) for item in result["results"] if item["error"]] == [
+        (1, "Email already registered"), (2, "email: Field required"), (3, "Email already registered"),
+    ]
+    created = [item["id"] for item in result["results"] if item["id"]]
+    assert [client.get(f"/users/{user_id}").json()["name"] for user_id in created] == ["Bob", "Cid"]
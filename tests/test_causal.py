@@ -0,0 +1,56 @@
+from bson import Timestamp
+
+import main
+
+MALFORMED_TOKEN = main.encode_causal_token(Timestamp(1, 1), {"clusterTime": "1"})
+
+
+class RefusingSession:
+    # The driver validates $clusterTime when a session is advanced
+    ended = False
+
+    def advance_cluster_time(self, cluster_time: dict):
+        raise ValueError("Invalid cluster_time")
+
+    def advance_operation_time(self, operation_time: Timestamp):
+        pass
+
+    async def end_session(self):
+        self.ended = True
+
+
+def test_malformed_causal_token_is_ignored(client, event):
+    assert main.decode_causal_token(MALFORMED_TOKEN) is None
+
+    response = client.get("/events", headers={main.CAUSAL_TOKEN_HEADER: MALFORMED_TOKEN})
+    assert response.status_code == 200
+    client.cookies.set(main.CAUSAL_TOKEN_COOKIE, MALFORMED_TOKEN)
+    response = client.get("/events")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [event["id"]]
+
+
+def test_causal_session_ends_a_session_the_driver_refuses(client, monkeypatch):
+    session = RefusingSession()
+    monkeypatch.setattr(main.client, "start_session", lambda **kwargs: session, raising=False)
+    token = {"operationTime": Timestamp(1, 1), "clusterTime": {"clusterTime": Timestamp(1, 1)}}
+
+    async def scenario():
+        main.request_context.set(main.RequestContext(main.SecondaryPreferred(), token))
+        return await main.causal_session()
+
+    assert client.portal.call(scenario) is None
+    assert session.ended
+
+
+def test_cached_entity_older_than_the_causal_token_is_read_again(client, event, monkeypatch):
+    # Another worker cached the event before the write the token comes from
+    cache = main.LRUCache()
+    monkeypatch.setattr(main, "entity_cache", cache)
+    stale = main.CACHE_STAMP.pack(1, 1) + main.EventInDB(**{**event, "name": "Stale"}).model_dump_json().encode()
+    client.portal.call(cache.set, f"event:{event['id']}", stale)
+
+    assert client.get(f"/events/{event['id']}").json()["name"] == "Stale"
+    token = main.encode_causal_token(Timestamp(2, 1), {"clusterTime": Timestamp(2, 1)})
+    response = client.get(f"/events/{event['id']}", headers={main.CAUSAL_TOKEN_HEADER: token})
+    assert response.json()["name"] == "Party"
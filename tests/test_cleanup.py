@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+import main
+from test_messages import message
+from test_photos import upload
+
+
+@pytest.fixture(autouse=True)
+def cleanup(monkeypatch):
+    # The tests run the jobs themselves instead of the background worker
+    monkeypatch.setattr(main, "CLEANUP_WORKER", False)
+    monkeypatch.setattr(main, "CLEANUP_DOCS_PER_SECOND", float("inf"))
+
+
+def count(client, collection, query: dict = None) -> int:
+    return client.portal.call(collection.count_documents, query or {})
+
+
+def test_deleting_an_event_removes_everything_under_it(client, bucket, event, album, thread, user, png):
+    client.post(f"/threads/{thread['id']}/messages", json=message("hello")).raise_for_status()
+    upload(client, album, user, png)
+
+    client.delete(f"/events/{event['id']}").raise_for_status()
+    assert client.portal.call(main.run_cleanup_jobs) == 3
+
+    for collection in (main.photo_album_collection, main.photo_collection, main.thread_collection, main.message_collection, main.photo_blob_collection, main.cleanup_collection):
+        assert count(client, collection) == 0, collection.name
+    assert bucket.files == {}
+    assert client.get(f"/threads/{thread['id']}").status_code == 404
+
+
+def test_expired_lease_is_taken_over(client, thread):
+    client.post(f"/threads/{thread['id']}/messages", json=message("hello")).raise_for_status()
+    client.portal.call(main.queue_cleanup_jobs, "thread", [thread["id"]])
+    job = {"_id": f"thread:{thread['id']}"}
+
+    leased = {"lease_until": datetime.now(timezone.utc) + timedelta(minutes=1), "owner": "other:1"}
+    client.portal.call(main.cleanup_collection.update_one, job, {"$set": leased})
+    assert client.portal.call(main.run_cleanup_jobs) == 0
+    assert count(client, main.message_collection) == 1
+
+    expired = {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    client.portal.call(main.cleanup_collection.update_one, job, {"$set": expired})
+    assert client.portal.call(main.run_cleanup_jobs) == 1
+    assert count(client, main.message_collection) == 0
+    assert count(client, main.cleanup_collection) == 0
+
+
+def test_interrupted_job_resumes_where_it_stopped(client, thread, monkeypatch):
+    for text in ("one", "two", "three"):
+        client.post(f"/threads/{thread['id']}/messages", json=message(text)).raise_for_status()
+    client.delete(f"/threads/{thread['id']}").raise_for_status()
+    monkeypatch.setattr(main, "CLEANUP_BATCH_SIZE", 1)
+
+    delete_many = main.message_collection.delete_many
+    calls = []
+
+    async def failing_delete_many(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise AutoReconnect("connection lost")
+        return await delete_many(*args, **kwargs)
+
+    monkeypatch.setattr(main.message_collection, "delete_many", failing_delete_many)
+    with pytest.raises(AutoReconnect):
+        client.portal.call(main.run_cleanup_jobs)
+    assert count(client, main.message_collection) == 2
+
+    # The job stays leased until the lease of the interrupted run expires
+    assert client.portal.call(main.run_cleanup_jobs) == 0
+    expired = {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    client.portal.call(main.cleanup_collection.update_one, {"_id": f"thread:{thread['id']}"}, {"$set": expired})
+    assert client.portal.call(main.run_cleanup_jobs) == 1
+    assert count(client, main.message_collection) == 0
+    assert count(client, main.cleanup_collection) == 0
+
+
+def test_blob_references_are_recounted(client, bucket, album, user, png):
+    photo = upload(client, album, user, png)
+    upload(client, album, user, png)
+    [blob] = client.portal.call(main.photo_blob_collection.find().to_list)
+    assert blob["refs"] == 2
+
+    client.portal.call(main.photo_blob_collection.update_one, {"_id": blob["_id"]}, {"$set": {"refs": 5}})
+    assert client.portal.call(main.repair_photo_blobs, 10) == 1
+    assert client.portal.call(main.photo_blob_collection.find_one, {"_id": blob["_id"]})["refs"] == 2
+
+    # Photo documents removed without releasing their blob, as an interrupted cleanup leaves them
+    client.portal.call(main.photo_collection.delete_many, {})
+    assert client.portal.call(main.repair_photo_blobs, 10) == 1
+    assert count(client, main.photo_blob_collection) == 0
+    assert bucket.files == {}
+    assert client.get(photo["url"]).status_code == 404
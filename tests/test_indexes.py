@@ -0,0 +1,11 @@
+import main
+
+
+def test_ensure_indexes_replaces_an_older_text_index(client):
+    async def scenario() -> dict:
+        await main.user_collection.create_index([("name", main.TEXT), ("email", main.TEXT)])
+        await main.ensure_indexes()
+        return await main.user_collection.index_information()
+
+    text_indexes = [name for name, index in client.portal.call(scenario).items() if ("name", "text") in index["key"]]
+    assert text_indexes == ["name_text"]
@@ -0,0 +1,36 @@
+from bson import ObjectId
+
+
+def test_adding_an_existing_member_is_idempotent(client, event, user):
+    url = f"/events/{event['id']}/lists/members/{user['id']}"
+    assert client.put(url).json() == {"added": True}
+    assert client.put(url).json() == {"added": False}
+
+    assert client.get(f"/events/{event['id']}/lists/members").json() == [user["id"]]
+    assert client.get(url).json() == {"member": True}
+    assert client.get(f"/events/{event['id']}").json()["members"] == [user["id"]]
+
+
+def test_removing_a_member_is_idempotent(client, event, user):
+    url = f"/events/{event['id']}/lists/members/{user['id']}"
+    client.put(url).raise_for_status()
+
+    assert client.delete(url).json() == {"removed": True}
+    assert client.delete(url).json() == {"removed": False}
+    assert client.get(url).json() == {"member": False}
+    assert client.put(f"/events/{ObjectId()}/lists/members/{user['id']}").status_code == 404
+
+
+def test_member_list_pages(client, event):
+    members = [str(ObjectId()) for _ in range(5)]
+    for member in members:
+        client.put(f"/events/{event['id']}/lists/members/{member}").raise_for_status()
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = client.get(f"/events/{event['id']}/lists/members", params=params)
+        pages.append(response.json())
+        if "x-next-cursor" not in response.headers:
+            break
+        params["after"] = response.headers["x-next-cursor"]
+    assert pages == [members[0:2], members[2:4], members[4:]]
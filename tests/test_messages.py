@@ -0,0 +1,44 @@
+import main
+
+
+def message(text: str, timestamp: str = "2024-06-01T21:00:00") -> dict:
+    return {"text": text, "user": "ann", "timestamp": timestamp, "parents": ""}
+
+
+def test_bulk_messages_are_published(client, thread, refreshed_threads):
+    subscriber, _ = main.message_broker.subscribe(thread["id"])
+    try:
+        response = client.post(f"/threads/{thread['id']}/messages/bulk", json=[message("one"), {"text": 1}, message("two")])
+        assert response.json()["inserted"] == 2
+
+        events = [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+        assert [(event_type, data["text"]) for _, event_type, data in events] == [("created", "one"), ("created", "two")]
+        assert [data["id"] for _, _, data in events] == [item["id"] for item in response.json()["results"] if item["id"]]
+    finally:
+        main.message_broker.unsubscribe(thread["id"], subscriber)
+    assert refreshed_threads == [thread["id"]]
+
+
+def test_last_message_keeps_the_latest_timestamp(client, thread):
+    url = f"/threads/{thread['id']}/messages"
+    later = client.post(url, json=message("later", "2024-06-01T22:00:00")).json()
+    client.post(url, json=message("earlier", "2024-06-01T21:00:00")).raise_for_status()
+
+    summary = client.get(f"/threads/{thread['id']}").json()
+    assert summary["message_count"] == 2
+    assert summary["last_message"]["id"] == later["id"]
+
+
+def test_new_timestamp_refreshes_the_thread_summary(client, thread, refreshed_threads):
+    url = f"/threads/{thread['id']}/messages"
+    created = client.post(url, json=message("hello")).json()
+
+    client.patch(f"{url}/{created['id']}", json={"text": "edited"}).raise_for_status()
+    client.put(f"{url}/{created['id']}", json=message("same time")).raise_for_status()
+    assert refreshed_threads == []
+
+    response = client.patch(f"{url}/{created['id']}", json={"timestamp": "2024-06-02T08:00:00"})
+    assert response.json()["text"] == "same time"
+    assert response.json()["timestamp"] == "2024-06-02T08:00:00"
+    client.put(f"{url}/{created['id']}", json=message("moved back")).raise_for_status()
+    assert refreshed_threads == [thread["id"], thread["id"]]
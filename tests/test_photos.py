@@ -0,0 +1,105 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import main
+
+
+def upload(client, album, user, png) -> dict:
+    response = client.post(
+        f"/photoalbum/{album['id']}/photo",
+        data={"user_id": user["id"]},
+        files={"photo": ("red.png", png, "image/png")},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def test_photo_url_is_cacheable_forever(client, album, user, png):
+    created = upload(client, album, user, png)
+    photos = client.get(f"/photoalbum/{album['id']}/photo").json()
+    assert [photo["url"] for photo in photos] == [created["url"]]
+    assert "?v=" in created["url"]
+
+    response = client.get(created["url"])
+    assert response.status_code == 200
+    assert response.content == png
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    unversioned = client.get(created["url"].split("?")[0])
+    assert unversioned.headers["cache-control"] == "no-cache"
+
+
+def test_photo_url_follows_sparse_fields(client, album, user, png):
+    upload(client, album, user, png)
+    photos = client.get(f"/photoalbum/{album['id']}/photo", params={"fields": "filename"}).json()
+    assert list(photos[0]) == ["filename", "id"]
+
+
+@pytest.mark.parametrize("range_header, part", [
+    ("bytes=0-9", slice(0, 10)),
+    ("bytes=10-", slice(10, None)),
+    ("bytes=-20", slice(-20, None)),
+    ("bytes=5-1000000", slice(5, None)),
+])
+def test_photo_range_is_served_partially(client, album, user, png, range_header, part):
+    url = upload(client, album, user, png)["url"]
+    response = client.get(url, headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.content == png[part]
+    start = part.start % len(png)
+    assert response.headers["content-range"] == f"bytes {start}-{start + len(png[part]) - 1}/{len(png)}"
+    assert response.headers["content-length"] == str(len(png[part]))
+
+
+@pytest.mark.parametrize("range_header", ["bytes={length}-", "bytes=9-3", "bytes=-0"])
+def test_unsatisfiable_range_is_rejected(client, album, user, png, range_header):
+    url = upload(client, album, user, png)["url"]
+    response = client.get(url, headers={"Range": range_header.format(length=len(png))})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(png)}"
+
+
+@pytest.mark.parametrize("range_header", ["bytes=0-1,4-5", "items=0-9", "bytes=a-b"])
+def test_unsupported_range_gets_the_whole_photo(client, album, user, png, range_header):
+    url = upload(client, album, user, png)["url"]
+    response = client.get(url, headers={"Range": range_header})
+    assert response.status_code == 200
+    assert response.content == png
+
+
+def test_upload_renders_variants_from_the_stored_file(client, album, user, png):
+    created = upload(client, album, user, png)
+    assert (created["width"], created["height"]) == (64, 48)
+    assert set(created["variants"]) == {"thumbnail", "medium", "webp"}
+
+    thumbnail = client.get(created["variants"]["thumbnail"]["url"])
+    assert thumbnail.status_code == 200
+    assert thumbnail.headers["content-type"] == "image/jpeg"
+
+
+def test_store_retry_writes_the_whole_file(client, album, user, png, bucket, monkeypatch):
+    # A concurrent upload wins the insert of the blob, which is then released before this
+    # upload acquires it, so store_photo stores the file a second time
+    acquire_photo_blob = main.acquire_photo_blob
+    insert_one = main.photo_blob_collection.insert_one
+    misses = []
+
+    async def acquire_losing_the_race(digest):
+        if len(misses) < 2:
+            misses.append(digest)
+            return None
+        return await acquire_photo_blob(digest)
+
+    async def insert_one_after_a_duplicate(document):
+        monkeypatch.setattr(main.photo_blob_collection, "insert_one", insert_one)
+        raise DuplicateKeyError("E11000 duplicate key")
+
+    monkeypatch.setattr(main, "acquire_photo_blob", acquire_losing_the_race)
+    monkeypatch.setattr(main.photo_blob_collection, "insert_one", insert_one_after_a_duplicate)
+    created = upload(client, album, user, png)
+
+    assert len(misses) == 2
+    blobs = client.portal.call(main.photo_blob_collection.find({}, {"length": 1, "refs": 1}).to_list)
+    assert [(blob["length"], blob["refs"]) for blob in blobs] == [(len(png), 1)]
+    assert client.get(created["url"]).content == png
+    assert [data for data, _, metadata in bucket.files.values() if "variant" not in metadata] == [png]
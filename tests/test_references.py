@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+import main
+
+
+def old_id(year: int) -> str:
+    # Made before the filter was loaded, so a Bloom filter miss is trusted
+    return str(ObjectId.from_datetime(datetime(year, 1, 1, tzinfo=timezone.utc)))
+
+
+@pytest.fixture
+def event_filter(client, event, monkeypatch) -> main.IdFilter:
+    id_filter = main.id_filters["event"]
+    monkeypatch.setattr(id_filter, "bloom", None)
+    monkeypatch.setattr(id_filter, "loaded_at", None)
+    client.portal.call(id_filter.load)
+    return id_filter
+
+
+@pytest.fixture
+def looked_up(monkeypatch) -> list:
+    # The ids sent to Mongo by existing_ids
+    looked_up = []
+    find = main.event_collection.find
+
+    def recording_find(query, *args, **kwargs):
+        looked_up.extend(str(entity_id) for entity_id in query["_id"]["$in"])
+        return find(query, *args, **kwargs)
+
+    monkeypatch.setattr(main.event_collection, "find", recording_find)
+    return looked_up
+
+
+def test_bloom_false_positive_is_confirmed_in_mongo(client, event, event_filter, looked_up):
+    false_positive, missing = old_id(2020), old_id(2021)
+    # A collision in the filter looks like an id that exists
+    event_filter.bloom.add(false_positive)
+    assert event_filter.surely_missing(missing)
+    assert not event_filter.surely_missing(false_positive)
+
+    found = client.portal.call(main.existing_ids, "event", [event["id"], false_positive, missing, "not-an-id"])
+    assert found == {event["id"]}
+    assert sorted(looked_up) == sorted([event["id"], false_positive])
+
+
+def test_id_created_after_the_load_is_looked_up(client, event_filter, looked_up):
+    # Inserted by another worker, this filter never saw it
+    inserted = client.portal.call(main.event_collection.insert_one, {"name": "Elsewhere"})
+    event_id = str(inserted.inserted_id)
+
+    assert client.portal.call(main.existing_ids, "event", [event_id]) == {event_id}
+    assert looked_up == [event_id]
+
+
+def test_bulk_threads_skip_false_positive_parents(client, event, user, event_filter):
+    false_positive = old_id(2020)
+    event_filter.bloom.add(false_positive)
+    thread = {"text": "Hello", "user": user["id"], "timestamp": "2024-06-01T20:00:00"}
+
+    response = client.post("/threads/bulk", json=[{**thread, "parents_id": event["id"]}, {**thread, "parents_id": false_positive}, {**thread, "parents_id": old_id(2021)}])
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (1, 2)
+    assert [item["index"] for item in result["results"] if item["error"]] == [1, 2]
+    assert client.post("/threads", json={**thread, "parents_id": false_positive}).status_code == 404
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import main
+
+EVENT = {
+    "description": "",
+    "start_date": "2024-06-01T20:00:00",
+    "end_date": "2024-06-02T02:00:00",
+    "cover_photo": "",
+    "is_private": False,
+}
+
+
+def test_event_search_ands_location_with_name(client, monkeypatch):
+    # The stand-in has no $text, it is replaced by a match of any of its terms on the name
+    open_cursor = main.open_cursor
+
+    async def open_text_cursor(collection, query, order, limit=None, after=None, text=None, *args):
+        if text:
+            terms = {"name": {"$regex": "|".join(text.split()), "$options": "i"}}
+            query = {"$and": [query, terms]} if query else terms
+        return await open_cursor(collection, query, main.ID_ORDER, limit, after, None, *args)
+
+    monkeypatch.setattr(main, "open_cursor", open_text_cursor)
+    for name, location in [("Summer party", "Paris"), ("Summer party", "Lyon"), ("Quiz night", "Paris")]:
+        client.post("/events/", json={**EVENT, "name": name, "location": location}).raise_for_status()
+
+    response = client.get("/events", params={"name": "party", "location": "paris"})
+    assert response.status_code == 200
+    assert [(event["name"], event["location"]) for event in response.json()] == [("Summer party", "Paris")]
+
+
+def test_user_search_email_is_a_literal_substring(client):
+    client.post("/users/", json={"name": "Ann", "email": "ann+events@example.com"}).raise_for_status()
+    client.post("/users/", json={"name": "Annie", "email": "annevents@example.com"}).raise_for_status()
+
+    response = client.get("/users/", params={"email": "ANN+EVENTS"})
+    assert [user["name"] for user in response.json()] == ["Ann"]
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/groups", {"name": "Hello"}),
+    ("/threads", {"text": "Hello"}),
+    ("/threads/{thread}/messages/search/", {"text": "Hello"}),
+    ("/photoalbum/photo/search", {"filename": "Hello"}),
+])
+@pytest.mark.parametrize("mode", ["text", "regex"])
+def test_search_uses_the_text_index_or_a_capped_regex(client, thread, monkeypatch, path, params, mode):
+    searches = []
+    open_cursor = main.open_cursor
+
+    async def recording_cursor(collection, query, order, limit=None, after=None, text=None, max_time_ms=None, *args):
+        searches.append((json.dumps(query, default=str), text, max_time_ms))
+        return await open_cursor(collection, query, main.ID_ORDER, limit, after, None, max_time_ms, *args)
+
+    monkeypatch.setattr(main, "open_cursor", recording_cursor)
+    response = client.get(path.format(thread=thread["id"]), params={**params, "mode": mode})
+    assert response.status_code == 200
+
+    [(query, text, max_time_ms)] = searches
+    if mode == "text":
+        assert (text, max_time_ms) == ("Hello", None)
+        assert "$regex" not in query
+    else:
+        assert (text, max_time_ms) == (None, main.REGEX_MAX_TIME_MS)
+        assert "$regex" in query
+
+
+def test_photo_search_filters_on_the_uploader(client, album, user, png):
+    created = client.post(f"/photoalbum/{album['id']}/photo", data={"user_id": user["id"]}, files={"photo": ("red.png", png, "image/png")}).json()
+
+    response = client.get("/photoalbum/photo/search", params={"user": user["id"]})
+    assert [photo["id"] for photo in response.json()] == [created["id"]]
+    response = client.get("/photoalbum/photo/search", params={"user": "someone-else"})
+    assert response.json() == []
@@ -0,0 +1,24 @@
+def names(client, kind: str, q: str) -> list:
+    response = client.get(f"/typeahead/{kind}", params={"q": q})
+    assert response.status_code == 200
+    return [match["name"] for match in response.json()]
+
+
+def test_typeahead_follows_a_name_patch(client):
+    user = client.post("/users/", json={"name": "Jean Dupont", "email": "jd@example.com"}).json()
+    assert names(client, "users", "dup") == ["Jean Dupont"]
+
+    client.patch(f"/users/{user['id']}", json={"name": "Élodie Martin"}).raise_for_status()
+    assert names(client, "users", "dup") == []
+    assert names(client, "users", "elo") == ["Élodie Martin"]
+    assert names(client, "users", "MART") == ["Élodie Martin"]
+    # The email key is kept when only the name changes
+    assert names(client, "users", "jd@") == ["Élodie Martin"]
+
+
+def test_typeahead_ranks_names_starting_with_the_prefix_first(client, event):
+    client.patch(f"/events/{event['id']}", json={"name": "Summer party"}).raise_for_status()
+    fields = {key: value for key, value in event.items() if key != "id"}
+    client.post("/events/", json={**fields, "name": "Party planning"}).raise_for_status()
+
+    assert names(client, "events", "party") == ["Party planning", "Summer party"]
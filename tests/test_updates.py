@@ -0,0 +1,29 @@
+from bson import ObjectId
+
+
+def test_patch_with_an_empty_body_returns_the_document(client, event):
+    response = client.patch(f"/events/{event['id']}", json={})
+    assert response.status_code == 200
+    assert response.json() == event
+
+    assert client.patch(f"/events/{ObjectId()}", json={}).status_code == 404
+
+
+def test_patch_only_sets_the_fields_sent(client, event):
+    # Reading the event first puts it in the entity cache, the PATCH has to drop it
+    client.get(f"/events/{event['id']}").raise_for_status()
+
+    response = client.patch(f"/events/{event['id']}", json={"location": "Lyon", "name": None})
+    assert response.status_code == 200
+    assert response.json() == {**event, "location": "Lyon"}
+    assert client.get(f"/events/{event['id']}").json() == {**event, "location": "Lyon"}
+
+
+def test_put_returns_the_replaced_document(client, event):
+    replacement = {**event, "name": "Picnic", "is_private": True}
+    del replacement["id"]
+
+    response = client.put(f"/events/{event['id']}", json=replacement)
+    assert response.status_code == 200
+    assert response.json() == {**event, "name": "Picnic", "is_private": True}
+    assert client.put(f"/events/{ObjectId()}", json=replacement).status_code == 404